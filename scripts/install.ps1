@@ -127,7 +127,7 @@ function Install-Package {
 
     # Install dependencies
     # When published to PyPI: pip install obsidian-stt-server
-    & pip install websockets numpy faster-whisper torch --quiet
+    & pip install websockets numpy faster-whisper torch orjson --quiet
 
     Write-ColorOutput "Installed dependencies" -Color Green
 }
@@ -104,7 +104,7 @@ install_package() {
     # Install the package
     # For now, install dependencies directly. When published to PyPI, use:
     # pip install obsidian-stt-server
-    pip install websockets numpy faster-whisper torch --quiet
+    pip install websockets numpy faster-whisper torch orjson uvloop --quiet
 
     echo -e "${GREEN}Installed dependencies${NC}"
 }
@@ -7,7 +7,6 @@ from .config import (
     get_optimal_config,
     get_hardware_info,
 )
-from .server import STTServer, run_server
 
 __version__ = "0.1.0"
 __all__ = [
@@ -18,3 +17,11 @@ __all__ = [
     "get_optimal_config",
     "get_hardware_info",
 ]
+
+
+def __getattr__(name: str):
+    # Defer importing the server (and websockets) until it is actually used
+    if name in ("STTServer", "run_server"):
+        from . import server
+        return getattr(server, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
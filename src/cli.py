@@ -4,7 +4,6 @@
 import argparse
 import sys
 
-from .server import run_server
 from .config import get_optimal_config, get_hardware_info
 
 
@@ -110,6 +109,9 @@ Models (smallest to largest):
 
     args = parser.parse_args()
 
+    # Imported after argument parsing so --help stays fast
+    from .server import run_server
+
     # Determine configuration
     if args.auto or (args.model is None and args.device is None):
         # Auto mode: detect optimal settings
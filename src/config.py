@@ -1,8 +1,11 @@
 """Configuration for the STT server."""
 
 from dataclasses import dataclass
-from typing import Literal
+from functools import lru_cache
+from typing import Literal, Optional
 import os
+import shutil
+import subprocess
 
 
 @dataclass
@@ -27,8 +30,26 @@ class TranscriberConfig:
     language: str = "en"
 
 
+@lru_cache(maxsize=1)
 def cuda_available() -> bool:
-    """Check if CUDA is available for GPU inference."""
+    """Check if an NVIDIA driver is present (probed once per process).
+
+    This is a cheap pre-check for display that avoids importing torch. Use
+    torch_cuda_available() to choose the device a model runs on.
+    """
+    return (
+        os.path.exists("/proc/driver/nvidia/version")
+        or shutil.which("nvidia-smi") is not None
+    )
+
+
+@lru_cache(maxsize=1)
+def torch_cuda_available() -> bool:
+    """Check if CUDA is usable by torch for GPU inference (probed once per process).
+
+    This is the authority for device selection. It deliberately does not rely
+    on cuda_available(), whose driver heuristic misses e.g. WSL2 hosts.
+    """
     try:
         import torch
         return torch.cuda.is_available()
@@ -36,8 +57,9 @@ def cuda_available() -> bool:
         return False
 
 
+@lru_cache(maxsize=1)
 def get_system_memory_gb() -> float:
-    """Get total system memory in GB."""
+    """Get total system memory in GB (probed once per process)."""
     try:
         import psutil
         return psutil.virtual_memory().total / (1024 ** 3)
@@ -54,29 +76,79 @@ def get_system_memory_gb() -> float:
         return 8.0  # Assume 8GB if we can't detect
 
 
+@lru_cache(maxsize=1)
+def cpu_has_vnni() -> bool:
+    """Check if the CPU supports VNNI int8 dot-product instructions (Linux only)."""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    flags = line.split()
+                    return "avx512_vnni" in flags or "avx_vnni" in flags
+    except Exception:
+        pass
+    return False
+
+
+@lru_cache(maxsize=1)
+def get_gpu_compute_capability() -> Optional[tuple[int, int]]:
+    """Get the (major, minor) CUDA compute capability of the first GPU, if known."""
+    if not torch_cuda_available():
+        return None
+
+    # Ask torch so CUDA_VISIBLE_DEVICES and CUDA device ordering match the
+    # device faster-whisper will actually use
+    try:
+        import torch
+        return tuple(torch.cuda.get_device_capability(0))
+    except Exception:
+        return None
+
+
+def get_cuda_compute_type() -> str:
+    """Pick a CUDA compute type supported efficiently by the detected GPU.
+
+    int8_float16 needs Tensor Cores (Volta, compute capability 7.0+).
+    Pascal GPUs run plain float16, and older GPUs fall back to int8.
+    """
+    capability = get_gpu_compute_capability()
+    if capability is None or capability[0] >= 7:
+        return "int8_float16"
+    elif capability[0] >= 6:
+        return "float16"
+    else:
+        return "int8"
+
+
 def get_optimal_config() -> TranscriberConfig:
     """Auto-detect hardware and return optimal transcriber configuration.
 
     Returns configuration optimized for the detected hardware:
-    - GPU (CUDA): distil-large-v3 with int8_float16 for best quality
+    - GPU (CUDA): distil-large-v3 for best quality, with int8_float16 on
+      Tensor Core GPUs and float16/int8 on older ones
     - CPU with 8GB+ RAM: small model with int8 for good balance
     - CPU with <8GB RAM: tiny model with int8 for speed
+
+    On CPUs with VNNI, int8 inference is fast enough to step up one model
+    size (medium / base).
     """
-    has_cuda = cuda_available()
+    # Only pick CUDA if torch can use it, not merely when a driver exists
+    has_cuda = torch_cuda_available()
     memory_gb = get_system_memory_gb()
+    has_vnni = not has_cuda and cpu_has_vnni()
 
     if has_cuda:
         # GPU mode: use best quality model
         return TranscriberConfig(
             model="distil-large-v3",
             device="cuda",
-            compute_type="int8_float16",
+            compute_type=get_cuda_compute_type(),
             beam_size=1,
         )
     elif memory_gb >= 8:
         # CPU with enough RAM: balanced model
         return TranscriberConfig(
-            model="small",
+            model="medium" if has_vnni else "small",
             device="cpu",
             compute_type="int8",
             beam_size=1,
@@ -84,29 +156,47 @@ def get_optimal_config() -> TranscriberConfig:
     else:
         # Low memory: fast/small model
         return TranscriberConfig(
-            model="tiny",
+            model="base" if has_vnni else "tiny",
             device="cpu",
             compute_type="int8",
             beam_size=1,
         )
 
 
+@lru_cache(maxsize=1)
+def get_gpu_name() -> Optional[str]:
+    """Get the name of the first CUDA device, or None without CUDA."""
+    if not cuda_available():
+        return None
+
+    # Ask the driver first so the banner doesn't need to import torch
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.splitlines()[0].strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    try:
+        import torch
+        return torch.cuda.get_device_name(0)
+    except Exception:
+        return "Unknown GPU"
+
+
 def get_hardware_info() -> dict:
     """Get information about available hardware for display."""
     has_cuda = cuda_available()
     memory_gb = get_system_memory_gb()
 
-    gpu_name = None
-    if has_cuda:
-        try:
-            import torch
-            gpu_name = torch.cuda.get_device_name(0)
-        except Exception:
-            gpu_name = "Unknown GPU"
-
     return {
         "cuda_available": has_cuda,
-        "gpu_name": gpu_name,
+        "gpu_name": get_gpu_name(),
         "system_memory_gb": round(memory_gb, 1),
         "cpu_count": os.cpu_count() or 1,
     }
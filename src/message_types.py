@@ -1,9 +1,24 @@
 """WebSocket message types for STT server communication."""
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Literal, Optional
 import json
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
 
 # Client -> Server messages
 
@@ -14,7 +29,7 @@ class StartMessage:
     language: Optional[str] = None
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self))
+        return _dumps(self.__dict__)
 
 
 @dataclass
@@ -23,17 +38,20 @@ class StopMessage:
     type: Literal["stop"] = "stop"
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self))
+        return _dumps(self.__dict__)
 
 
 @dataclass
 class AudioMessage:
-    """Audio chunk for transcription."""
+    """Audio chunk for transcription.
+
+    Clients may instead send raw audio bytes as a binary WebSocket frame.
+    """
     type: Literal["audio"] = "audio"
     data: str = ""  # Base64 encoded audio data
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self))
+        return _dumps(self.__dict__)
 
 
 # Server -> Client messages
@@ -46,10 +64,11 @@ class StatusMessage:
     error: Optional[str] = None
 
     def to_json(self) -> str:
-        d = asdict(self)
+        # Messages only hold flat fields, so a shallow copy replaces asdict()
+        d = dict(self.__dict__)
         if d["error"] is None:
             del d["error"]
-        return json.dumps(d)
+        return _dumps(d)
 
 
 @dataclass
@@ -61,25 +80,37 @@ class TranscriptMessage:
     confidence: Optional[float] = None
 
     def to_json(self) -> str:
-        d = asdict(self)
-        if d["confidence"] is None:
-            del d["confidence"]
-        return json.dumps(d)
+        if self.confidence is None:
+            # Hot path: sent for every transcript update
+            return (
+                f'{{"type":"transcript","text":{_dumps(self.text)},'
+                f'"isFinal":{"true" if self.isFinal else "false"}}}'
+            )
+        return _dumps(self.__dict__)
+
+
+# Client message constructors keyed by "type" (audio first: it is the hot path)
+_CLIENT_MESSAGE_PARSERS = {
+    "audio": lambda msg: AudioMessage(data=msg.get("data", "")),
+    "start": lambda msg: StartMessage(language=msg.get("language")),
+    "stop": lambda msg: StopMessage(),
+}
 
 
 def parse_client_message(data: str) -> StartMessage | StopMessage | AudioMessage | None:
     """Parse a message from the client."""
     try:
-        msg = json.loads(data)
-        msg_type = msg.get("type")
-
-        if msg_type == "start":
-            return StartMessage(language=msg.get("language"))
-        elif msg_type == "stop":
-            return StopMessage()
-        elif msg_type == "audio":
-            return AudioMessage(data=msg.get("data", ""))
-        else:
-            return None
-    except json.JSONDecodeError:
+        msg = _loads(data)
+    except _JSONDecodeError:
+        return None
+
+    if not isinstance(msg, dict):
         return None
+
+    # Guard the dict lookup: a list/object "type" would be unhashable
+    msg_type = msg.get("type")
+    if not isinstance(msg_type, str):
+        return None
+
+    parser = _CLIENT_MESSAGE_PARSERS.get(msg_type)
+    return parser(msg) if parser else None
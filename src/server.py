@@ -32,10 +32,37 @@ class STTServer:
         self.server_config = server_config
         self.transcriber_config = transcriber_config
         self.clients: Set[WebSocketServerProtocol] = set()
-        self.transcriber: Transcriber | None = None
         self._current_websocket: WebSocketServerProtocol | None = None
         self._loop: asyncio.AbstractEventLoop | None = None
 
+        # One long-lived transcriber so the model is loaded once and reused
+        # across recording sessions
+        self.transcriber = Transcriber(
+            model=transcriber_config.model,
+            device=transcriber_config.device,
+            compute_type=transcriber_config.compute_type,
+            language=transcriber_config.language,
+            beam_size=transcriber_config.beam_size,
+        )
+        self.transcriber.set_transcript_callback(self._on_transcript)
+
+        # start()/stop() run in worker threads on the shared transcriber; this
+        # keeps a new session from starting while the previous one finishes
+        self._session_lock = asyncio.Lock()
+
+    def _on_transcript(self, result: TranscriptionResult):
+        """Forward transcriber updates (from worker threads) to the event loop."""
+        if self._current_websocket and self._loop:
+            # Serialize once, here in the worker thread, rather than on the loop
+            payload = TranscriptMessage(
+                text=result.text,
+                isFinal=result.is_final,
+            ).to_json()
+            asyncio.run_coroutine_threadsafe(
+                self._send_transcript(payload),
+                self._loop
+            )
+
     async def handle_client(self, websocket: WebSocketServerProtocol):
         """Handle a single client connection."""
         self.clients.add(websocket)
@@ -49,6 +76,12 @@ class STTServer:
             await websocket.send(StatusMessage(status="ready").to_json())
 
             async for raw_message in websocket:
+                # Binary frames carry raw audio, skipping JSON and base64 decoding
+                if isinstance(raw_message, (bytes, bytearray)):
+                    if self.transcriber.is_active():
+                        self.transcriber.feed_audio(raw_message)
+                    continue
+
                 message = parse_client_message(raw_message)
 
                 if message is None:
@@ -76,36 +109,20 @@ class STTServer:
             self.clients.discard(websocket)
             self._current_websocket = None
             # Clean up transcriber if this client started it
-            if self.transcriber and self.transcriber.is_active():
-                self.transcriber.stop()
-                self.transcriber = None
+            async with self._session_lock:
+                if self.transcriber.is_active():
+                    await asyncio.get_running_loop().run_in_executor(None, self.transcriber.stop)
 
     async def _handle_start(self, websocket: WebSocketServerProtocol, message: StartMessage):
         """Handle start recording request."""
         logger.info(f"Starting transcription with language={message.language}")
 
         try:
-            # Create new transcriber
-            self.transcriber = Transcriber(
-                model=self.transcriber_config.model,
-                device=self.transcriber_config.device,
-                compute_type=self.transcriber_config.compute_type,
-                language=message.language or self.transcriber_config.language,
-                beam_size=self.transcriber_config.beam_size,
-            )
-
-            # Set up callback for real-time updates
-            def on_transcript(result: TranscriptionResult):
-                if self._current_websocket and self._loop:
-                    asyncio.run_coroutine_threadsafe(
-                        self._send_transcript(result),
-                        self._loop
-                    )
-
-            self.transcriber.set_transcript_callback(on_transcript)
-
-            # Start transcription
-            self.transcriber.start(language=message.language)
+            # Start transcription (may load the model, so keep it off the event loop)
+            async with self._session_lock:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.transcriber.start, message.language
+                )
 
             await websocket.send(StatusMessage(status="recording").to_json())
 
@@ -113,14 +130,11 @@ class STTServer:
             logger.error(f"Error starting transcription: {e}")
             await websocket.send(StatusMessage(status="error", error=str(e)).to_json())
 
-    async def _send_transcript(self, result: TranscriptionResult):
-        """Send transcript to client."""
+    async def _send_transcript(self, payload: str):
+        """Send an already-serialized transcript to client."""
         if self._current_websocket:
             try:
-                await self._current_websocket.send(TranscriptMessage(
-                    text=result.text,
-                    isFinal=result.is_final,
-                ).to_json())
+                await self._current_websocket.send(payload)
             except Exception as e:
                 logger.error(f"Error sending transcript: {e}")
 
@@ -128,15 +142,19 @@ class STTServer:
         """Handle stop recording request."""
         logger.info("Stopping transcription")
 
-        if not self.transcriber:
-            await websocket.send(StatusMessage(status="error", error="Not recording").to_json())
-            return
-
         try:
-            await websocket.send(StatusMessage(status="processing").to_json())
+            async with self._session_lock:
+                if not self.transcriber.is_active():
+                    await websocket.send(StatusMessage(status="error", error="Not recording").to_json())
+                    return
+
+                await websocket.send(StatusMessage(status="processing").to_json())
 
-            # Stop transcription (this blocks briefly for final transcription)
-            final_text = self.transcriber.stop()
+                # Stop transcription in a worker thread so the event loop keeps
+                # serving pings and other clients during the final Whisper pass
+                final_text = await asyncio.get_running_loop().run_in_executor(
+                    None, self.transcriber.stop
+                )
 
             await websocket.send(TranscriptMessage(
                 text=final_text,
@@ -148,12 +166,10 @@ class STTServer:
         except Exception as e:
             logger.error(f"Error stopping transcription: {e}")
             await websocket.send(StatusMessage(status="error", error=str(e)).to_json())
-        finally:
-            self.transcriber = None
 
     async def _handle_audio(self, websocket: WebSocketServerProtocol, message: AudioMessage):
         """Handle incoming audio chunk."""
-        if not self.transcriber or not self.transcriber.is_active():
+        if not self.transcriber.is_active():
             return
 
         # Feed audio to transcriber (non-blocking)
@@ -161,12 +177,22 @@ class STTServer:
 
     async def run(self):
         """Start the WebSocket server."""
+        # Load the model before accepting connections so the first recording
+        # doesn't wait for it
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.transcriber.load_model)
+        except Exception as e:
+            logger.error(f"Error preloading model, will retry on first recording: {e}")
+
         logger.info(f"Starting STT server on ws://{self.server_config.host}:{self.server_config.port}")
 
         async with websockets.serve(
             self.handle_client,
             self.server_config.host,
             self.server_config.port,
+            # Opus audio is already compressed and transcripts are small JSON,
+            # so permessage-deflate would only cost CPU on every frame
+            compression=None,
         ):
             logger.info("STT server running. Press Ctrl+C to stop.")
             await asyncio.Future()  # Run forever
@@ -196,8 +222,16 @@ def run_server(
 
     server = STTServer(server_config, transcriber_config)
 
+    # Prefer uvloop's libuv event loop when installed (not available on Windows)
+    try:
+        import uvloop
+        run = uvloop.run
+        logger.info("Using uvloop event loop")
+    except (ImportError, AttributeError):
+        run = asyncio.run
+
     try:
-        asyncio.run(server.run())
+        run(server.run())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
 
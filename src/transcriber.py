@@ -1,19 +1,67 @@
 """Faster-whisper based transcriber for audio transcription."""
 
 import base64
-import io
 import logging
+import queue
 import subprocess
-import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Optional, Callable
 import threading
 
 import numpy as np
 
+from .config import torch_cuda_available
+
 logger = logging.getLogger(__name__)
 
+# FFmpeg command converting WebM/Opus on stdin to raw PCM on stdout
+# -f webm: force input format (more lenient parsing)
+# -i pipe:0: read input from stdin
+# -f f32le: output as 32-bit float little-endian
+# -ar 16000: resample to 16kHz
+# -ac 1: convert to mono
+# pipe:1: output to stdout
+FFMPEG_DECODE_CMD = [
+    "ffmpeg",
+    "-hide_banner",
+    "-loglevel", "error",
+    "-f", "webm",
+    "-i", "pipe:0",
+    "-f", "f32le",
+    "-ar", "16000",
+    "-ac", "1",
+    "pipe:1",
+]
+
+# Samples read from FFmpeg stdout per iteration (float32, 256KB)
+PCM_READ_SAMPLES = 65536
+
+# FFmpeg stderr lines kept for the error log
+STDERR_TAIL_LINES = 20
+
+# Initial PCM buffer capacity (30s at 16kHz); grows by doubling
+INITIAL_PCM_SAMPLES = 16000 * 30
+
+# Error fragments indicating CUDA libraries failed to load at runtime.
+# CUDA can pass availability checks yet fail on first use when e.g.
+# libcublas/libcudnn are missing, so these trigger a fallback to CPU.
+CUDA_LOAD_ERROR_MARKERS = ("libcublas", "libcudnn", "CUDA driver", "CUBLAS_STATUS")
+
+
+def join_segments(segments) -> str:
+    """Join segment texts with single spaces, skipping empty segments."""
+    return " ".join(filter(None, (segment.text.strip() for segment in segments)))
+
+
+def is_cuda_load_error(error: Exception) -> bool:
+    """Check if an error means the CUDA runtime is unusable (not just out of memory)."""
+    message = str(error)
+    if "out of memory" in message.lower():
+        return False
+    return any(marker in message for marker in CUDA_LOAD_ERROR_MARKERS)
+
 
 @dataclass
 class TranscriptionResult:
@@ -27,9 +75,20 @@ class Transcriber:
     """
     Transcriber using faster-whisper.
 
-    Accumulates audio chunks and transcribes them in batches for efficiency.
+    Streams audio chunks into an FFmpeg decoder while recording. Whenever a
+    full 30s Whisper window has been decoded it is transcribed in the
+    background, so only the remaining tail is left when recording stops.
     """
 
+    # Silero VAD settings, shared by every transcription
+    _VAD_PARAMS = {"min_silence_duration_ms": 500, "speech_pad_ms": 200}
+
+    # Below this many samples (3s at 16kHz) VAD costs more than it saves
+    _VAD_MIN_SAMPLES = 16000 * 3
+
+    # Whisper's native input length (30s at 16kHz), transcribed while recording
+    _WINDOW_SAMPLES = 16000 * 30
+
     def __init__(
         self,
         model: str = "distil-large-v3",
@@ -46,13 +105,31 @@ class Transcriber:
 
         self.model = None
         self.is_recording = False
-        self.audio_buffer: list[bytes] = []
         self.current_text = ""
         self.language = language
 
         self._on_transcript: Optional[Callable[[TranscriptionResult], None]] = None
         self._stop_event = threading.Event()
 
+        # Streaming decoder state (one FFmpeg process per recording session)
+        self._ffmpeg: Optional[subprocess.Popen] = None
+        self._pcm_thread: Optional[threading.Thread] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._stderr_thread: Optional[threading.Thread] = None
+        self._audio_queue: queue.Queue = queue.Queue()
+        self._stderr_tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+        self._pcm = np.empty(0, dtype=np.float32)
+        self._pcm_len = 0
+        self._bytes_fed = 0
+
+        # Windows transcribed while recording. A single worker thread runs all
+        # inference so the model is only ever used from one thread.
+        self._inference_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+        self._window_future: Optional[Future] = None
+        self._window_start = 0
+        self._window_texts: list[str] = []
+        self._windowing_failed = False
+
     def _load_model(self):
         """Lazy load the whisper model."""
         if self.model is None:
@@ -65,21 +142,21 @@ class Transcriber:
             compute_type = self.compute_type
 
             # Check if CUDA should be used
-            cuda_available = False
+            use_cuda = False
             if device == "cuda":
                 try:
-                    import torch
-                    if torch.cuda.is_available():
+                    if torch_cuda_available():
+                        import torch
                         # Test if cuDNN actually works
                         try:
                             torch.backends.cudnn.is_available()
-                            cuda_available = True
+                            use_cuda = True
                         except Exception:
                             logger.warning("cuDNN not available")
                 except Exception as e:
                     logger.warning(f"CUDA check failed: {e}")
 
-            if device == "cuda" and not cuda_available:
+            if device == "cuda" and not use_cuda:
                 logger.warning("CUDA/cuDNN not available, falling back to CPU")
                 device = "cpu"
                 compute_type = "int8"
@@ -94,133 +171,294 @@ class Transcriber:
             if device == "cpu":
                 os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
-            self.model = WhisperModel(
-                self.model_name,
-                device=device,
-                compute_type=compute_type,
-            )
+            try:
+                self.model = WhisperModel(
+                    self.model_name,
+                    device=device,
+                    compute_type=compute_type,
+                )
+            except (OSError, RuntimeError) as e:
+                if device != "cuda" or not is_cuda_load_error(e):
+                    raise
+                logger.warning(f"CUDA model load failed ({e}), falling back to CPU")
+                self._fall_back_to_cpu()
+                return
+
+            # Remember what was actually loaded so runtime fallback can tell
+            self.device = device
+            self.compute_type = compute_type
             logger.info("Model loaded successfully")
 
+    def load_model(self) -> None:
+        """Load the whisper model ahead of the first recording session."""
+        self._load_model()
+
+    def _fall_back_to_cpu(self):
+        """Drop the current model and reload it on CPU."""
+        self.model = None
+        self.device = "cpu"
+        self.compute_type = "int8"
+        self._load_model()
+
     def set_transcript_callback(self, callback: Callable[[TranscriptionResult], None]):
         """Set callback for real-time transcript updates."""
         self._on_transcript = callback
 
     def start(self, language: Optional[str] = None) -> None:
-        """Start a recording session."""
+        """Start a recording session, discarding any session still in progress."""
         self._load_model()
 
+        if self._ffmpeg is not None:
+            logger.warning("Recording already in progress, discarding it")
+            self.is_recording = False
+            self._abort_decoder()
+
         self.language = language or self.default_language
-        self.is_recording = True
-        self.audio_buffer = []
         self.current_text = ""
         self._stop_event.clear()
+        self._start_decoder()
+        self.is_recording = True
 
         logger.info(f"Transcriber started with language={self.language}")
 
-    def _transcribe_audio(self, audio_bytes: bytes) -> str:
-        """Transcribe audio bytes using faster-whisper."""
-        if not audio_bytes or len(audio_bytes) < 1000:
-            logger.warning(f"Audio too short: {len(audio_bytes)} bytes")
-            return ""
-
+    def _start_decoder(self) -> None:
+        """Launch the FFmpeg decoder and the threads feeding and draining it."""
+        self._pcm = np.empty(INITIAL_PCM_SAMPLES, dtype=np.float32)
+        self._pcm_len = 0
+        self._bytes_fed = 0
+        self._window_future = None
+        self._window_start = 0
+        self._window_texts = []
+        self._windowing_failed = False
+        self._ffmpeg = subprocess.Popen(
+            FFMPEG_DECODE_CMD,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._pcm_thread = threading.Thread(
+            target=self._pcm_reader,
+            args=(self._ffmpeg.stdout,),
+            name="ffmpeg-pcm-reader",
+            daemon=True,
+        )
+        self._pcm_thread.start()
+
+        # Pipe writes can block, so they happen off the event loop
+        self._audio_queue = queue.Queue()
+        self._writer_thread = threading.Thread(
+            target=self._audio_writer,
+            args=(self._ffmpeg.stdin, self._audio_queue),
+            name="ffmpeg-audio-writer",
+            daemon=True,
+        )
+        self._writer_thread.start()
+
+        # Keep draining stderr so a noisy stream can't stall FFmpeg
+        self._stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        self._stderr_thread = threading.Thread(
+            target=self._stderr_reader,
+            args=(self._ffmpeg.stderr, self._stderr_tail),
+            name="ffmpeg-stderr-reader",
+            daemon=True,
+        )
+        self._stderr_thread.start()
+
+    @staticmethod
+    def _audio_writer(stdin, audio_queue: queue.Queue) -> None:
+        """Write queued audio chunks to FFmpeg until None, then close its stdin."""
         try:
-            # Convert WebM/Opus to PCM using PyAV
-            logger.info(f"Decoding {len(audio_bytes)} bytes of audio...")
-            audio_array = self._decode_audio(audio_bytes)
-
-            if audio_array is None:
-                logger.error("Audio decode returned None")
-                return ""
-
-            if len(audio_array) < 1000:
-                logger.warning(f"Decoded audio too short: {len(audio_array)} samples")
-                return ""
-
-            logger.info(f"Decoded to {len(audio_array)} samples ({len(audio_array)/16000:.1f}s), transcribing...")
-
-            # Transcribe
-            segments, info = self.model.transcribe(
-                audio_array,
-                language=self.language,
-                beam_size=self.beam_size,
-                vad_filter=True,
-                vad_parameters=dict(
-                    min_silence_duration_ms=500,
-                    speech_pad_ms=200,
-                ),
-            )
-
-            # Combine all segments
-            text = " ".join(segment.text.strip() for segment in segments)
-            logger.info(f"Transcribed: '{text[:100]}{'...' if len(text) > 100 else ''}")
-            return text.strip()
+            while True:
+                chunk = audio_queue.get()
+                if chunk is None:
+                    break
+                stdin.write(chunk)
+                stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            logger.error(f"Error writing audio to FFmpeg: {e}")
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
 
+    @staticmethod
+    def _stderr_reader(stderr, tail: deque) -> None:
+        """Drain FFmpeg stderr, keeping only the last few lines."""
+        try:
+            for line in stderr:
+                tail.append(line.decode(errors="replace").rstrip())
+        except (OSError, ValueError):
+            pass
+
+    def _join_decoder_threads(self, timeout: float) -> None:
+        """Wait for the writer, PCM reader and stderr threads to exit."""
+        for name in ("_writer_thread", "_pcm_thread", "_stderr_thread"):
+            thread = getattr(self, name)
+            if thread is not None:
+                thread.join(timeout=timeout)
+                setattr(self, name, None)
+
+    def _pcm_reader(self, stdout) -> None:
+        """Read decoded PCM from FFmpeg into the growing sample buffer until it exits."""
+        try:
+            while True:
+                end = self._pcm_len + PCM_READ_SAMPLES
+                if end > len(self._pcm):
+                    grown = np.empty(max(end, 2 * len(self._pcm)), dtype=np.float32)
+                    grown[:self._pcm_len] = self._pcm[:self._pcm_len]
+                    self._pcm = grown
+
+                # Read straight into the buffer; buffered reads fill the whole
+                # block until EOF, so samples stay aligned
+                n = stdout.readinto(memoryview(self._pcm[self._pcm_len:end]).cast("B"))
+                if not n:
+                    break
+                self._pcm_len += n // 4
+                self._maybe_submit_window()
         except Exception as e:
-            logger.error(f"Transcription error: {e}", exc_info=True)
-            return self.current_text
-
-    def _decode_audio(self, audio_bytes: bytes) -> Optional[np.ndarray]:
-        """Decode WebM/Opus audio to numpy array using FFmpeg (more lenient than PyAV)."""
+            logger.error(f"PCM reader failed: {e}", exc_info=True)
+
+    def _maybe_submit_window(self) -> None:
+        """Queue the next 30s window for inference once it is fully decoded."""
+        if self._windowing_failed or self.model is None:
+            return
+        if self._window_future is not None and not self._window_future.done():
+            return
+
+        # The previous window has finished, so its start offset is final
+        start = self._window_start
+        if self._pcm_len - start >= self._WINDOW_SAMPLES:
+            # Slice now: the view stays valid even if the buffer is regrown
+            window = self._pcm[start:start + self._WINDOW_SAMPLES]
+            self._window_future = self._inference_pool.submit(self._transcribe_window, window, start)
+
+    def _transcribe_window(self, window: np.ndarray, start: int) -> None:
+        """Transcribe one window while recording and advance past its complete segments."""
         try:
-            # Write to temp file
-            with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f:
-                f.write(audio_bytes)
-                temp_path = f.name
-
-            try:
-                logger.info(f"Decoding WebM with FFmpeg from: {temp_path} ({len(audio_bytes)} bytes)")
-
-                # Use FFmpeg to convert to raw PCM
-                # -f webm: force input format (more lenient parsing)
-                # -i: input file
-                # -f f32le: output as 32-bit float little-endian
-                # -ar 16000: resample to 16kHz
-                # -ac 1: convert to mono
-                # pipe:1: output to stdout
-                result = subprocess.run(
-                    [
-                        "ffmpeg",
-                        "-hide_banner",
-                        "-loglevel", "error",
-                        "-f", "webm",
-                        "-i", temp_path,
-                        "-f", "f32le",
-                        "-ar", "16000",
-                        "-ac", "1",
-                        "pipe:1",
-                    ],
-                    capture_output=True,
-                    timeout=30,
-                )
-
-                if result.returncode != 0:
-                    logger.error(f"FFmpeg failed: {result.stderr.decode()}")
-                    return None
-
-                if not result.stdout:
-                    logger.error("FFmpeg produced no output")
-                    return None
-
-                # Convert raw bytes to numpy array
-                audio = np.frombuffer(result.stdout, dtype=np.float32)
-                logger.info(f"Decoded {len(audio)} samples ({len(audio)/16000:.1f}s at 16kHz)")
-                return audio
-
-            except subprocess.TimeoutExpired:
-                logger.error("FFmpeg timed out")
-                return None
-            except Exception as e:
-                logger.error(f"FFmpeg decode failed: {e}", exc_info=True)
-                return None
-            finally:
-                # Clean up temp file
-                Path(temp_path).unlink(missing_ok=True)
-
+            # No per-segment interims: the last segment may be dropped below
+            segments = self._run_model(window, interim=False)
         except Exception as e:
-            logger.error(f"Audio decode error: {e}", exc_info=True)
-            return None
+            logger.error(f"Window transcription failed, deferring to final pass: {e}", exc_info=True)
+            self._windowing_failed = True
+            return
+
+        # The last segment may be cut off at the window edge, so leave it
+        # for the next window unless it is the only one
+        if len(segments) > 1:
+            segments = segments[:-1]
+            advance = int(segments[-1].end * 16000)
+        else:
+            advance = self._WINDOW_SAMPLES
+
+        text = join_segments(segments)
+        if text:
+            self._window_texts.append(text)
+            if self._on_transcript:
+                self._on_transcript(TranscriptionResult(
+                    text=" ".join(self._window_texts),
+                    is_final=False
+                ))
+        self._window_start = start + max(1, min(advance, self._WINDOW_SAMPLES))
+        logger.info(f"Transcribed window ending at {self._window_start/16000:.1f}s")
+
+    def _wait_for_window(self) -> None:
+        """Wait for any in-flight window transcription to finish."""
+        if self._window_future is not None:
+            self._window_future.result()
+            self._window_future = None
+
+    def _abort_decoder(self) -> None:
+        """Kill the FFmpeg decoder and drop any PCM decoded so far."""
+        proc = self._ffmpeg
+        self._ffmpeg = None
+        if proc is None:
+            return
+
+        proc.kill()
+        proc.wait()
+        self._audio_queue.put(None)
+        self._join_decoder_threads(timeout=5)
+        self._wait_for_window()
+        for stream in (proc.stdin, proc.stdout, proc.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self._pcm = np.empty(0, dtype=np.float32)
+        self._pcm_len = 0
+
+    def _finish_decoder(self) -> np.ndarray:
+        """Close FFmpeg's input, wait for it to flush, and return all decoded PCM."""
+        proc = self._ffmpeg
+        self._ffmpeg = None
+        if proc is None:
+            return np.empty(0, dtype=np.float32)
+
+        # The writer closes stdin once the queued audio is written
+        self._audio_queue.put(None)
 
-    def _transcribe_audio_array(self, audio_array: np.ndarray) -> str:
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            logger.error("FFmpeg timed out")
+            proc.kill()
+            proc.wait()
+
+        self._join_decoder_threads(timeout=30)
+        proc.stdout.close()
+        proc.stderr.close()
+        if proc.returncode != 0:
+            stderr_tail = "\n".join(self._stderr_tail)
+            logger.error(f"FFmpeg failed: {stderr_tail}")
+
+        # Hand out a view of the filled region instead of copying it
+        audio = self._pcm[:self._pcm_len]
+        self._pcm = np.empty(0, dtype=np.float32)
+        self._pcm_len = 0
+        logger.info(f"Decoded {len(audio)} samples ({len(audio)/16000:.1f}s at 16kHz)")
+        return audio
+
+    def _run_model(self, audio_array: np.ndarray, interim: bool = True) -> list:
+        """Run whisper on the audio, retrying once on CPU if CUDA fails at runtime."""
+        try:
+            return self._whisper_transcribe(audio_array, interim)
+        except (OSError, RuntimeError) as e:
+            if self.device != "cuda" or not is_cuda_load_error(e):
+                raise
+            logger.warning(f"CUDA transcription failed ({e}), retrying on CPU")
+            self._fall_back_to_cpu()
+            return self._whisper_transcribe(audio_array, interim)
+
+    def _whisper_transcribe(self, audio_array: np.ndarray, interim: bool = True) -> list:
+        """Transcribe audio with the loaded model and return its segments.
+
+        With interim set, each segment is reported as an interim transcript
+        (everything transcribed so far this session) as soon as it is decoded.
+        """
+        segments, info = self.model.transcribe(
+            audio_array,
+            language=self.language,
+            beam_size=self.beam_size,
+            vad_filter=len(audio_array) >= self._VAD_MIN_SAMPLES,
+            vad_parameters=self._VAD_PARAMS,
+        )
+
+        # Segments are decoded lazily, so CUDA errors surface while collecting
+        collected = []
+        parts = list(self._window_texts)
+        for segment in segments:
+            collected.append(segment)
+            text = segment.text.strip()
+            if text and interim and self._on_transcript:
+                parts.append(text)
+                self._on_transcript(TranscriptionResult(
+                    text=" ".join(parts),
+                    is_final=False
+                ))
+        return collected
+
+    def _transcribe_array(self, audio_array: np.ndarray) -> str:
         """Transcribe numpy audio array using faster-whisper."""
         if len(audio_array) < 1000:
             logger.warning(f"Audio too short: {len(audio_array)} samples")
@@ -229,20 +467,9 @@ class Transcriber:
         try:
             logger.info(f"Transcribing {len(audio_array)} samples ({len(audio_array)/16000:.1f}s)...")
 
-            segments, info = self.model.transcribe(
-                audio_array,
-                language=self.language,
-                beam_size=self.beam_size,
-                vad_filter=True,
-                vad_parameters=dict(
-                    min_silence_duration_ms=500,
-                    speech_pad_ms=200,
-                ),
-            )
-
-            text = " ".join(segment.text.strip() for segment in segments)
+            text = join_segments(self._run_model(audio_array))
             logger.info(f"Transcription result: '{text[:100]}' ({len(text)} chars)")
-            return text.strip()
+            return text
 
         except Exception as e:
             logger.error(f"Transcription error: {e}", exc_info=True)
@@ -258,9 +485,10 @@ class Transcriber:
         if not self.is_recording:
             return None
 
-        # Accumulate raw bytes - decode all at once at the end
-        self.audio_buffer.append(audio_bytes)
-        logger.debug(f"Received audio chunk: {len(audio_bytes)} bytes, total chunks: {len(self.audio_buffer)}")
+        # Queue for the writer thread - PCM is collected by the reader thread
+        self._audio_queue.put(audio_bytes)
+        self._bytes_fed += len(audio_bytes)
+        logger.debug(f"Received audio chunk: {len(audio_bytes)} bytes, total: {self._bytes_fed} bytes")
 
         return None  # Results come via callback
 
@@ -281,17 +509,21 @@ class Transcriber:
         self.is_recording = False
         self._stop_event.set()
 
-        logger.info(f"Stopping transcription, {len(self.audio_buffer)} chunks accumulated")
+        logger.info(f"Stopping transcription, {self._bytes_fed} bytes of audio received")
+
+        # Flush the decoder and let the last in-flight window finish; only
+        # the tail after the transcribed windows is left to process
+        audio_array = self._finish_decoder()
+        self._wait_for_window()
 
-        if self.audio_buffer:
-            # Concatenate all raw bytes
-            all_audio_bytes = b"".join(self.audio_buffer)
-            logger.info(f"Total audio: {len(all_audio_bytes)} bytes")
+        tail = audio_array[self._window_start:]
+        tail_text = ""
+        if len(tail):
+            tail_text = self._inference_pool.submit(self._transcribe_array, tail).result()
 
-            # Decode with FFmpeg and transcribe
-            final_text = self._transcribe_audio(all_audio_bytes)
-            if final_text:
-                self.current_text = final_text
+        final_text = " ".join(text for text in self._window_texts + [tail_text] if text)
+        if final_text:
+            self.current_text = final_text
 
         logger.info(f"Final transcript: '{self.current_text}'")
 